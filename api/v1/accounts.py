@@ -1,8 +1,8 @@
-from bson import ObjectId
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from redis import Redis
 
-from fastapi import APIRouter, HTTPException, Depends, status, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Request, BackgroundTasks
 
 from config.jwt_authentication import get_access_jwt_aut
 from db.mongodb import get_db
@@ -10,22 +10,22 @@ from db.redisdb import get_notif_redis
 from schemas.user import UserSignUp, UserSignIn, UserInfo, UserProfileUpdate, ShowUserProfile, ChangePassword, BaseUser, \
     ResetPassword, Verify, UserIdList
 from services.notification_microservice import notification_client
-from utils.user_utils import get_password_hash, verify_password
+from utils.user_utils import hash_password_async, verify_password_async, password_needs_rehash
 
 routers = APIRouter(prefix="/v1")
 
+PROFILE_PROJECTION = {"_id": 0, "email": 1, "first_name": 1, "last_name": 1}
+
 
 @routers.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(user: UserSignUp, db=Depends(get_db)):
     users = db["accounts"]
-    result = await users.find_one({"email": user.email})
-
-    if result:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     doc = {"email": user.email, "password": hashed_password, "is_account_enable": user.is_account_enable}
-    await users.insert_one(doc)
+    try:
+        await users.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     _id = str(doc["_id"])
     user_info = UserInfo(id=_id, email=user.email)
 
@@ -34,21 +34,22 @@ async def register(user: UserSignUp, db=Depends(get_db)):
 
 @routers.post("/verify", status_code=status.HTTP_200_OK)
 async def verify(verification_info: Verify, db=Depends(get_db), redis: Redis = Depends(get_notif_redis)):
-    email = await redis.get(verification_info.code)
+    email = await redis.getdel(verification_info.code)
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid code")
 
     users = db["accounts"]
-    result = await users.find_one({"email": email}, {"is_account_enable": 1})
-    if result["is_account_enable"]:
-        return {"your account is enabled"}
-
-    await users.find_one_and_update(
+    result = await users.find_one_and_update(
         filter={"email": email},
         update={"$set": {"is_account_enable": True}},
+        projection={"_id": 0, "is_account_enable": 1},
+        return_document=ReturnDocument.BEFORE,
     )
+    if not result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Email does not exist")
+    if result["is_account_enable"]:
+        return {"your account is enabled"}
 
-    # publisher to delete code from redis
     return {"your account was enabled successfully"}
 
 
@@ -59,12 +60,16 @@ async def login(request: Request, user: UserSignIn, db=Depends(get_db)):
 
     if not result:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email is wrong")
-    if not verify_password(user.password, result["password"]):
+    if not await verify_password_async(user.password, result["password"]):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Password is wrong")
     if not result["is_account_enable"]:
         raise HTTPException(status_code=455,
                             detail="your account has not been verified yet, we sent you the verification code")
 
+    if password_needs_rehash(result["password"]):
+        await users.update_one({"_id": result["_id"]},
+                               {"$set": {"password": await hash_password_async(user.password)}})
+
     user_id = str(result["_id"])
     data = {"id": user_id, "email": user.email}
     return data
@@ -73,10 +78,10 @@ async def login(request: Request, user: UserSignIn, db=Depends(get_db)):
 @routers.get("/show_profile", status_code=status.HTTP_200_OK)
 async def show_profile(request: Request, payload: dict = Depends(get_access_jwt_aut()), db=Depends(get_db)):
     users = db["accounts"]
-    result = await users.find_one({"_id": ObjectId(payload["id"])}, {"_id": 0, "password": 0})
+    result = await users.find_one({"_id": payload["_oid"]}, PROFILE_PROJECTION)
     result["id"] = payload["id"]
     # setattr(request.state, "user_id", payload["id"])
-    result = ShowUserProfile(**result).model_dump(exclude_none=True)
+    result = ShowUserProfile.model_construct(**result).model_dump(exclude_none=True)
     return result
 
 
@@ -84,52 +89,59 @@ async def show_profile(request: Request, payload: dict = Depends(get_access_jwt_
 async def profile_update(user_data: UserProfileUpdate, payload: dict = Depends(get_access_jwt_aut()),
                          db=Depends(get_db)):
     users = db["accounts"]
-    result = await users.find_one_and_update(
-        filter={"_id": ObjectId(payload["id"])},
-        update={"$set": user_data.model_dump(exclude_unset=True)},
-        projection={"_id": 0, "password": 0, "is_account_enable": 0},
-        return_document=ReturnDocument.AFTER)
+    try:
+        result = await users.find_one_and_update(
+            filter={"_id": payload["_oid"]},
+            update={"$set": user_data.model_dump(exclude_unset=True)},
+            projection=PROFILE_PROJECTION,
+            return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     result["id"] = payload["id"]
-    result = ShowUserProfile(**result).model_dump(exclude_none=True)
+    result = ShowUserProfile.model_construct(**result).model_dump(exclude_none=True)
     return result
 
 
 @routers.patch("/change_password", status_code=status.HTTP_200_OK)
-async def profile_update(user_data: ChangePassword, payload: dict = Depends(get_access_jwt_aut()), db=Depends(get_db)):
+async def change_password(user_data: ChangePassword, payload: dict = Depends(get_access_jwt_aut()), db=Depends(get_db)):
     users = db["accounts"]
-    result = await users.find_one({"_id": ObjectId(payload["id"])}, {"password": 1})
-    if not verify_password(user_data.old_password, result["password"]):
+    result = await users.find_one({"_id": payload["_oid"]}, {"password": 1})
+    if not await verify_password_async(user_data.old_password, result["password"]):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Password is wrong")
-    await users.find_one_and_update(
-        filter={"_id": ObjectId(payload["id"])},
-        update={"$set": {"password": get_password_hash(user_data.new_password)}},
-    )
+    hashed_password = await hash_password_async(user_data.new_password)
+    # only swap if the password is still the one that was just verified
+    update_result = await users.update_one({"_id": payload["_oid"], "password": result["password"]},
+                                           {"$set": {"password": hashed_password}})
+    if not update_result.matched_count:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Password was changed concurrently")
     return {"password changed successfully"}
 
 
 @routers.post("/reset_password_request", status_code=status.HTTP_200_OK)
-async def reset_password_request(request: Request, user_email: BaseUser, db=Depends(get_db)):
+async def reset_password_request(request: Request, user_email: BaseUser, background_tasks: BackgroundTasks,
+                                 db=Depends(get_db)):
     users = db["accounts"]
     result = await users.find_one({"email": user_email.email}, {"email": 1})
     if not result:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Email does not exist")
 
-    await notification_client.code_call({"email": result["email"], "action": "reset password"}, request)
+    background_tasks.add_task(notification_client.code_call,
+                              {"email": result["email"], "action": "reset password"}, request)
     return {"A code was sent to your email"}
 
 
 @routers.patch("/reset_password", status_code=status.HTTP_200_OK)
 async def reset_password(reset_password_info: ResetPassword, db=Depends(get_db),
                          redis: Redis = Depends(get_notif_redis)):
-    email = await redis.get(reset_password_info.code)
+    email = await redis.getdel(reset_password_info.code)
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
     users = db["accounts"]
+    hashed_password = await hash_password_async(reset_password_info.new_password)
     await users.find_one_and_update(
         filter={"email": email},
-        update={"$set": {"password": get_password_hash(reset_password_info.new_password)}},
+        update={"$set": {"password": hashed_password}},
     )
-    # publisher to delete code from redis
     return {"password changed successfully"}
 
 
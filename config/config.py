@@ -20,6 +20,8 @@ class Settings(BaseSettings):
 
     NOTIFICATION_CODE_SENDER: str
 
+    BCRYPT_ROUNDS: int = 10
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -1,5 +1,9 @@
+import hashlib
+import time
 from typing import Any
 import jwt
+from bson import ObjectId
+from cachetools import TTLCache
 
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -9,6 +13,9 @@ from db.redisdb import get_auth_redis
 
 redis = get_auth_redis()
 
+# decoded payloads keyed by a digest of the token, never the raw token
+payload_cache = TTLCache(maxsize=10000, ttl=30)
+
 
 class AccessJWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -20,19 +27,33 @@ class AccessJWTBearer(HTTPBearer):
             if not credentials.scheme == "Bearer":
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid authentication scheme.")
 
-            try:
-                payload = await decode_token(credentials.credentials)
-            except jwt.ExpiredSignatureError:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired access token")
-            except Exception:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid access token")
+            payload = await self.get_payload(credentials.credentials)
             result = await self.validate_jti_token(payload)
             if not result:
-                HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid access token")
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid access token")
             return payload
         else:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No access token found")
 
+    @staticmethod
+    async def get_payload(token: str) -> dict:
+        key = hashlib.sha256(token.encode()).hexdigest()[:32]
+        payload = payload_cache.get(key)
+        if payload is not None:
+            if payload.get("exp", float("inf")) > time.time():
+                return payload
+            payload_cache.pop(key, None)
+
+        try:
+            payload = await decode_token(token)
+            payload["_oid"] = ObjectId(payload["id"])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired access token")
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid access token")
+        payload_cache[key] = payload
+        return payload
+
     @staticmethod
     async def validate_jti_token(payload: dict) -> Any:
         jti = payload.get('jti')
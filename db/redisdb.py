@@ -4,10 +4,17 @@ from config.config import get_settings
 
 settings = get_settings()
 
-auth_redis = redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
-                            encoding="utf-8", decode_responses=True, db=1)
-notif_redis = redis.from_url(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
-                             encoding="utf-8", decode_responses=True, db=2)
+redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}"
+
+
+def create_pool(db):
+    return redis.ConnectionPool.from_url(redis_url, encoding="utf-8", decode_responses=True, db=db,
+                                         max_connections=50, socket_keepalive=True, socket_timeout=2,
+                                         health_check_interval=30)
+
+
+auth_redis = redis.Redis(connection_pool=create_pool(1))
+notif_redis = redis.Redis(connection_pool=create_pool(2))
 
 
 def get_auth_redis():
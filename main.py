@@ -1,17 +1,41 @@
+import importlib.util
+import os
+import sys
 import time
 import traceback
+from contextlib import asynccontextmanager
 from uuid import uuid4
 import structlog
 import uvicorn
 
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 
 from api.v1.accounts import routers as accounts_router
 from config.config import get_settings
 from config.log_config import configure_logging
+from db.mongodb import get_db
+from db.redisdb import get_auth_redis, get_notif_redis
+from services.notification_microservice import get_notification_client
+from utils.user_utils import shutdown_bcrypt_pool
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db = get_db()
+    await db.command("ping")
+    await db["accounts"].create_index("email", unique=True)
+    await get_auth_redis().ping()
+    await get_notif_redis().ping()
+    notification_client = get_notification_client()
+    notification_client.start()
+    await notification_client.warm_up()
+    yield
+    await notification_client.close()
+    shutdown_bcrypt_pool()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 settings = get_settings()
 
@@ -61,5 +85,20 @@ async def logger_middleware(request: Request, call_next):
 
 app.include_router(accounts_router, prefix="/accounts")
 
-if __name__ == "__main__":
+
+def run_dev():
     uvicorn.run("__main__:app", host="0.0.0.0", port=8002, reload=True)
+
+
+def run_prod():
+    # uvloop is not available on Windows, let uvicorn pick the default loop there
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    uvicorn.run("main:app", host="0.0.0.0", port=8002, workers=os.cpu_count(), loop=loop, http="httptools",
+                log_level="warning", reload=False)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "prod":
+        run_prod()
+    else:
+        run_dev()
@@ -1,9 +1,11 @@
-import re
+from string import ascii_lowercase, ascii_uppercase, digits
 from typing import List
 
 from fastapi import HTTPException, status
 from pydantic import BaseModel, EmailStr, field_validator, model_validator
 
+PASSWORD_SPECIAL_CHARACTERS = frozenset("#?!@$%^&*-_")
+
 
 class BaseUser(BaseModel):
     email: EmailStr
@@ -37,18 +39,23 @@ class PasswordMixins(BaseModel):
     new_password: str
     confirmed_new_password: str
 
-    @model_validator(mode='after')
-    def check_passwords_match(self):
-        password = self.new_password
-        confirmed_password = self.confirmed_new_password
-        if password is not None and password != confirmed_password:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Passwords don't match")
-        return self
+    @model_validator(mode='before')
+    @classmethod
+    def check_passwords_match(cls, data):
+        if isinstance(data, dict):
+            password = data.get("new_password")
+            confirmed_password = data.get("confirmed_new_password")
+            if password is not None and password != confirmed_password:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Passwords don't match")
+        return data
 
     @field_validator("new_password", mode="before")
     def validate_password(cls, value: str) -> str:
-        PASSWORD_PATTERN = "^(?=.*?[A-Z])(?=.*?[a-z])(?=.*?[0-9])(?=.*?[#?!@$%^&*-_]).{8,}$"
-        if re.match(PASSWORD_PATTERN, value):
+        if (isinstance(value, str) and len(value) >= 8
+                and any(c in ascii_uppercase for c in value)
+                and any(c in ascii_lowercase for c in value)
+                and any(c in digits for c in value)
+                and any(c in PASSWORD_SPECIAL_CHARACTERS for c in value)):
             return value
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail='Passwords must be at least 8 characters in length, '
@@ -8,10 +8,27 @@ settings = get_settings()
 class Notification:
     code_sender_url = settings.NOTIFICATION_CODE_SENDER
 
+    def __init__(self):
+        self._client = None
+
+    def start(self):
+        self._client = httpx.AsyncClient(timeout=5,
+                                         limits=httpx.Limits(max_connections=100, max_keepalive_connections=50))
+
+    async def warm_up(self):
+        try:
+            await self._client.head(self.code_sender_url)
+        except httpx.HTTPError:
+            pass
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def code_call(self, payload: dict, request):
         headers = {"unique_id": request.state.unique_id}
-        async with httpx.AsyncClient(headers=headers) as client:
-            response = await client.post(self.code_sender_url, json=payload)
+        response = await self._client.post(self.code_sender_url, json=payload, headers=headers)
         # response.raise_for_status()
         return response
 
@@ -1,6 +1,27 @@
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import TTLCache
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from config.config import get_settings
+
+settings = get_settings()
+
+# hashes made with a different cost than BCRYPT_ROUNDS are reported by password_needs_rehash
+# and re-hashed on the next successful login, so lowering/raising the cost migrates users gradually
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+                           bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+                           bcrypt__max_rounds=settings.BCRYPT_ROUNDS)
+
+# kept apart from the default threadpool so bcrypt bursts can't starve I/O offloading
+bcrypt_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="bcrypt")
+
+# keyed on sha256(password || stored hash), plaintext passwords are never stored
+verify_cache = TTLCache(maxsize=10000, ttl=30)
 
 
 def get_password_hash(password):
@@ -9,3 +30,26 @@ def get_password_hash(password):
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password):
+    return pwd_context.needs_update(hashed_password)
+
+
+async def hash_password_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(bcrypt_pool, get_password_hash, password)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    key = hashlib.sha256(f"{plain_password}\0{hashed_password}".encode()).hexdigest()
+    result = verify_cache.get(key)
+    if result is None:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(bcrypt_pool, verify_password, plain_password, hashed_password)
+        verify_cache[key] = result
+    return result
+
+
+def shutdown_bcrypt_pool():
+    bcrypt_pool.shutdown(wait=True)